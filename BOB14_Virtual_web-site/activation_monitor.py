@@ -0,0 +1,204 @@
+import hashlib
+import itertools
+import operator
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+# 반복 개통 탐지 (subject_hash 기준)
+# 모든 해시를 dict에 보관하지 않고, 고정 크기 슬라이딩 윈도우 Count-Min Sketch로
+# 빈도를 추정한 뒤, 임계치 근처의 소수 식별자만 정확 집계 테이블에 올린다.
+
+
+class SlidingCountMinSketch:
+    """윈도우를 buckets개 구간으로 나눈 Count-Min Sketch (항상 과대추정, 과소추정 없음)"""
+
+    def __init__(self, window_seconds: float = 3600, buckets: int = 6,
+                 width: int = 1 << 16, depth: int = 4):
+        if depth > 8:
+            raise ValueError("depth must be <= 8 (sha256 hex 기반 해시 분할)")
+        self.window_seconds = window_seconds
+        self.buckets = buckets
+        self.bucket_seconds = window_seconds / buckets
+        self.width = width
+        self.depth = depth
+        self.cells = width * depth
+
+        self.sketches = [self._zeros() for _ in range(buckets)]
+        # 구간 합계 (추정을 O(depth)로 유지하기 위해 별도 관리)
+        self.total = self._zeros()
+        self.current_index = 0
+        self.current_epoch: Optional[int] = None
+
+    def _zeros(self) -> array:
+        return array('I', bytes(4 * self.cells))
+
+    def _indexes(self, key: str) -> List[int]:
+        if len(key) != 64:
+            key = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        width = self.width
+        return [row * width + int(key[row * 8:(row + 1) * 8], 16) % width
+                for row in range(self.depth)]
+
+    def _advance(self, now: float):
+        epoch = int(now // self.bucket_seconds)
+        if self.current_epoch is None:
+            self.current_epoch = epoch
+            return
+        steps = epoch - self.current_epoch
+        if steps <= 0:
+            return
+
+        if steps >= self.buckets:
+            self.sketches = [self._zeros() for _ in range(self.buckets)]
+            self.total = self._zeros()
+        else:
+            for _ in range(steps):
+                self.current_index = (self.current_index + 1) % self.buckets
+                expired = self.sketches[self.current_index]
+                self.total = array('I', map(operator.sub, self.total, expired))
+                self.sketches[self.current_index] = self._zeros()
+        self.current_epoch = epoch
+
+    def window_start(self, now: float) -> float:
+        """현재 추정값이 포함하는 가장 오래된 시각"""
+        self._advance(now)
+        return (self.current_epoch - self.buckets + 1) * self.bucket_seconds
+
+    def add(self, key: str, now: float) -> int:
+        self._advance(now)
+        current = self.sketches[self.current_index]
+        total = self.total
+        estimate = None
+        for i in self._indexes(key):
+            current[i] += 1
+            total[i] += 1
+            if estimate is None or total[i] < estimate:
+                estimate = total[i]
+        return estimate
+
+    def estimate(self, key: str, now: float) -> int:
+        self._advance(now)
+        return min(self.total[i] for i in self._indexes(key))
+
+    def memory_bytes(self) -> int:
+        return 4 * self.cells * (self.buckets + 1)
+
+
+class ActivationMonitor:
+    EVICTION_SAMPLE = 16
+
+    def __init__(self, threshold: int = 20, window_seconds: float = 3600, buckets: int = 6,
+                 width: int = 1 << 16, depth: int = 4, table_size: int = 1024,
+                 admit_ratio: float = 0.5):
+        self.threshold = threshold
+        self.sketch = SlidingCountMinSketch(window_seconds, buckets, width, depth)
+        self.table_size = table_size
+        self.admit_threshold = max(1, int(threshold * admit_ratio))
+        # 정확 집계 테이블: 식별자 -> 슬롯 번호.
+        # 슬롯마다 편입 시점 추정치(seed)와 이후 이벤트 시각 링(event_cap개)을 미리 할당된 배열에 보관
+        self.event_cap = threshold * 2
+        self.table: Dict[str, int] = {}
+        self.free_slots = list(range(table_size - 1, -1, -1))
+        self.since = array('d', bytes(8 * table_size))
+        self.seed = array('q', bytes(8 * table_size))
+        self.head = array('q', bytes(8 * table_size))
+        self.size = array('q', bytes(8 * table_size))
+        self.times = array('d', bytes(8 * table_size * self.event_cap))
+        self.lock = threading.Lock()
+
+    def _append(self, slot: int, now: float):
+        cap = self.event_cap
+        base = slot * cap
+        if self.size[slot] < cap:
+            self.times[base + (self.head[slot] + self.size[slot]) % cap] = now
+            self.size[slot] += 1
+        else:
+            # 링이 가득 차면 가장 오래된 시각을 덮어씀
+            self.times[base + self.head[slot]] = now
+            self.head[slot] = (self.head[slot] + 1) % cap
+
+    def _tracked_count(self, slot: int, cutoff: float) -> int:
+        cap = self.event_cap
+        base = slot * cap
+        while self.size[slot] and self.times[base + self.head[slot]] < cutoff:
+            self.head[slot] = (self.head[slot] + 1) % cap
+            self.size[slot] -= 1
+        seed = self.seed[slot] if self.since[slot] >= cutoff else 0
+        return seed + self.size[slot]
+
+    def _count(self, slot: Optional[int], estimate: int, cutoff: float) -> int:
+        # 테이블에 없거나 시각 기록이 상한에 찬 항목은 스케치 추정값 사용
+        if slot is None or self.size[slot] >= self.event_cap:
+            return estimate
+        return min(estimate, self._tracked_count(slot, cutoff))
+
+    def _admit(self, key: str, estimate: int, now: float, cutoff: float):
+        if not self.free_slots:
+            # 가득 차면 가장 먼저 편입된 항목 일부 중 빈도가 가장 낮은 것 제거 (O(1))
+            candidates = itertools.islice(self.table, self.EVICTION_SAMPLE)
+            victim = min(candidates, key=lambda k: self._tracked_count(self.table[k], cutoff))
+            self.free_slots.append(self.table.pop(victim))
+        slot = self.free_slots.pop()
+        self.table[key] = slot
+        self.since[slot] = now
+        self.seed[slot] = estimate - 1
+        self.head[slot] = 0
+        self.size[slot] = 0
+        self._append(slot, now)
+
+    def _record(self, key: str, now: float) -> int:
+        estimate = self.sketch.add(key, now)
+        cutoff = self.sketch.window_start(now)
+        slot = self.table.get(key)
+        if slot is not None:
+            self._append(slot, now)
+        elif estimate >= self.admit_threshold:
+            self._admit(key, estimate, now, cutoff)
+        return self._count(slot, estimate, cutoff)
+
+    def record(self, key: str, now: Optional[float] = None) -> int:
+        """이벤트 1건 반영 후 윈도우 내 추정 건수 반환"""
+        now = time.time() if now is None else now
+        with self.lock:
+            return self._record(key, now)
+
+    def try_record(self, key: str, now: Optional[float] = None) -> Optional[int]:
+        """임계치를 넘기지 않을 때만 반영 (판정과 증가를 한 번에). 넘기면 반영 없이 None"""
+        now = time.time() if now is None else now
+        with self.lock:
+            estimate = self.sketch.estimate(key, now)
+            current = self._count(self.table.get(key), estimate, self.sketch.window_start(now))
+            if self.is_suspicious(current + 1):
+                return None
+            return self._record(key, now)
+
+    def count(self, key: str, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        with self.lock:
+            estimate = self.sketch.estimate(key, now)
+            return self._count(self.table.get(key), estimate, self.sketch.window_start(now))
+
+    def is_suspicious(self, count: int) -> bool:
+        return count > self.threshold
+
+    def top(self, limit: int = 20, now: Optional[float] = None) -> List[Dict]:
+        now = time.time() if now is None else now
+        with self.lock:
+            cutoff = self.sketch.window_start(now)
+            counts = [(key, self._count(slot, self.sketch.estimate(key, now), cutoff))
+                      for key, slot in self.table.items()]
+        counts.sort(key=lambda item: item[1], reverse=True)
+        return [{"subject_hash": key, "count": count} for key, count in counts[:limit] if count > 0]
+
+    def memory_bytes(self) -> int:
+        """실제 객체 크기 합계 (스케치 배열 + 테이블 배열/딕셔너리/키 문자열)"""
+        with self.lock:
+            arrays = [self.sketch.total, *self.sketch.sketches,
+                      self.since, self.seed, self.head, self.size, self.times]
+            total = sum(sys.getsizeof(a) for a in arrays)
+            total += sys.getsizeof(self.table) + sys.getsizeof(self.free_slots)
+            total += sum(sys.getsizeof(key) for key in self.table)
+        return total
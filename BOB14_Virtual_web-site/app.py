@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, session, redirect, url_for, render_template
+from flask import Flask, request, jsonify, session, redirect, url_for, render_template, Response, stream_with_context
 import hashlib
 import uuid
 import time
@@ -9,6 +9,10 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
 import secrets
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from resilience import Deadline, ProviderRegistry, ProviderUnavailable
+from audit_log import AuditLog
+from activation_monitor import ActivationMonitor
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-change-this')
@@ -33,6 +37,12 @@ class SessionStore:
         
         return self.sessions[key]
     
+    def set_many(self, items: Dict[str, Dict], expiry_seconds: int = 600):
+        # 대량 등록용 일괄 쓰기 (Redis 교체 시 파이프라인 MSET/EXPIRE 한 번)
+        expires_at = time.time() + expiry_seconds
+        self.sessions.update(items)
+        self.expiry_times.update((key, expires_at) for key in items)
+    
     def delete(self, key: str):
         if key in self.sessions:
             del self.sessions[key]
@@ -42,6 +52,12 @@ class SessionStore:
 # 전역 세션 저장소
 session_store = SessionStore()
 
+# 개통 감사 로그 (버퍼링 후 백그라운드 일괄 커밋)
+audit_log = AuditLog(
+    os.environ.get('AUDIT_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'audit.db')),
+    capacity=int(os.environ.get('AUDIT_BUFFER_CAPACITY', '65536'))
+)
+
 # JWT 토큰 관리
 class JWTHandler:
     def __init__(self, secret_key: str):
@@ -141,6 +157,51 @@ class ExternalIdP:
 
 idp = ExternalIdP()
 
+# 외부 연동 장애 격리 (인증기관별 회로 차단기 + 데드라인 + 헤지 요청)
+IDP_PROVIDERS = ["pass", "kakao", "naver"]
+REALNAME_PROVIDER = "realname"
+# 제휴사 대량 처리는 별도 차단기/격벽 사용 (대량 배치가 단건 1단계 슬롯을 잠식하지 않도록)
+BULK_REALNAME_PROVIDER = "realname_bulk"
+UPSTREAM_TIMEOUT_SECONDS = float(os.environ.get('UPSTREAM_TIMEOUT_SECONDS', '5'))
+UPSTREAM_MIN_TIMEOUT_SECONDS = float(os.environ.get('UPSTREAM_MIN_TIMEOUT_SECONDS', '0.5'))
+
+provider_registry = ProviderRegistry(
+    max_concurrency=int(os.environ.get('UPSTREAM_MAX_CONCURRENCY', '16')),
+    failure_threshold=int(os.environ.get('UPSTREAM_FAILURE_THRESHOLD', '5')),
+    reset_timeout=float(os.environ.get('UPSTREAM_RESET_TIMEOUT', '30'))
+)
+
+def request_budget() -> float:
+    """클라이언트가 보낸 남은 시간(X-Request-Timeout-Ms)과 기본 타임아웃 중 짧은 쪽 (하한 있음)"""
+    budget = UPSTREAM_TIMEOUT_SECONDS
+    header = request.headers.get("X-Request-Timeout-Ms")
+    if header:
+        try:
+            budget = min(budget, max(UPSTREAM_MIN_TIMEOUT_SECONDS, int(header) / 1000))
+        except ValueError:
+            pass
+    return budget
+
+def make_deadline(budget: float) -> Deadline:
+    return Deadline(budget, shortened=budget < UPSTREAM_TIMEOUT_SECONDS)
+
+def request_deadline() -> Deadline:
+    return make_deadline(request_budget())
+
+def provider_unavailable_response(error: ProviderUnavailable):
+    print(f"⛔ 외부 연동 차단: {error.provider} ({error.reason})")
+    # 실명확인은 인증기관으로 대체할 수 없으므로 대체 목록 없음
+    if error.provider in (REALNAME_PROVIDER, BULK_REALNAME_PROVIDER):
+        alternatives = []
+    else:
+        alternatives = [p for p in provider_registry.available(IDP_PROVIDERS) if p != error.provider]
+    return jsonify({
+        "error": "PROVIDER_UNAVAILABLE",
+        "provider": error.provider,
+        "reason": error.reason,
+        "alternatives": alternatives
+    }), 503
+
 # 유틸리티 함수
 def generate_subject_hash(name: str, rrn: str) -> str:
     """사용자 식별을 위한 해시 생성"""
@@ -151,6 +212,71 @@ def generate_secure_random() -> str:
     """암호학적으로 안전한 랜덤값 생성"""
     return secrets.token_urlsafe(32)
 
+def normalize_rrn(rrn: str) -> str:
+    """주민등록번호 형식 통일 (뒷자리 첫 번째 숫자만 사용, 나머지는 0으로 채움)"""
+    rrn_parts = rrn.split('-')
+    if len(rrn_parts) == 2 and len(rrn_parts[1]) >= 1:
+        return f"{rrn_parts[0]}-{rrn_parts[1][0]}000000"
+    return rrn
+
+def build_step1_session(name: str, rrn: str) -> Tuple[str, Dict]:
+    """1단계 완료 세션 생성 (사용자 해시는 정규화된 주민등록번호 사용)"""
+    sid = str(uuid.uuid4())
+    session_data = {
+        "step": "step1_completed",
+        "subject_hash": generate_subject_hash(name, normalize_rrn(rrn)),
+        "user_name": name,
+        "user_rrn": rrn,
+        "state": generate_secure_random(),
+        "nonce": generate_secure_random(),
+        "created_at": time.time()
+    }
+    return sid, session_data
+
+# 반복 개통 탐지 (flag: 감사 로그만 기록, throttle: 요청 차단)
+ACTIVATION_THRESHOLD = int(os.environ.get('ACTIVATION_THRESHOLD', '20'))
+ACTIVATION_WINDOW_SECONDS = float(os.environ.get('ACTIVATION_WINDOW_SECONDS', '3600'))
+ACTIVATION_ACTION = os.environ.get('ACTIVATION_ACTION', 'flag')
+
+activation_starts = ActivationMonitor(ACTIVATION_THRESHOLD, ACTIVATION_WINDOW_SECONDS)
+activation_completions = ActivationMonitor(ACTIVATION_THRESHOLD, ACTIVATION_WINDOW_SECONDS)
+
+def admit_activation(monitor: ActivationMonitor, stage: str, subject_hash: str,
+                     sid: Optional[str]) -> bool:
+    """윈도우 집계 반영 + 차단 판정을 원자적으로 수행. 차단되면 False (집계하지 않음)
+
+    집계 후 세션 저장 등이 실패하면 소폭 과대집계될 수 있음 (차단 우회보다 안전한 쪽)
+    """
+    if ACTIVATION_ACTION == "throttle":
+        count = monitor.try_record(subject_hash)
+        if count is None:
+            print(f"🚨 반복 개통 차단: {subject_hash[:16]}... ({stage})")
+            audit_log.record("repeat_activation", sid=sid, subject_hash=subject_hash,
+                             stage=stage, count=monitor.threshold, action="throttle")
+            return False
+    else:
+        count = monitor.record(subject_hash)
+    
+    if monitor.is_suspicious(count):
+        print(f"🚨 반복 개통 의심: {subject_hash[:16]}... ({stage}, 최근 {count}회)")
+        audit_log.record("repeat_activation", sid=sid, subject_hash=subject_hash,
+                         stage=stage, count=count, action="flag")
+    return True
+
+def too_many_activations_response():
+    return jsonify({
+        "error": "TOO_MANY_ACTIVATIONS",
+        "message": "짧은 시간 내 개통 시도가 너무 많습니다. 잠시 후 다시 시도해주세요."
+    }), 429
+
+def audit_callback_failure(sid: Optional[str], session_data: Optional[Dict], reason: str, **details):
+    audit_log.record("callback_failure", sid=sid,
+                     subject_hash=(session_data or {}).get("subject_hash"),
+                     reason=reason,
+                     provider=(session_data or {}).get("provider"),
+                     client_ip=request.remote_addr,
+                     **details)
+
 # 1단계: 실명확인
 @app.route("/step1/realname", methods=["POST"])
 def step1_realname():
@@ -167,43 +293,22 @@ def step1_realname():
             return jsonify({"error": "Missing required fields"}), 400
         
         # 실명확인 수행
-        if not verify_realname(name, rrn):
+        try:
+            verified = provider_registry.get(REALNAME_PROVIDER).call(
+                verify_realname, name, rrn, deadline=request_deadline(), hedge=True)
+        except ProviderUnavailable as e:
+            return provider_unavailable_response(e)
+        if not verified:
             return jsonify({"error": "Real name verification failed"}), 400
         
-        # 주민등록번호 형식 통일 (뒷자리 첫 번째 숫자만 사용, 나머지는 0으로 채움)
-        rrn_parts = rrn.split('-')
-        if len(rrn_parts) == 2:
-            rrn_front = rrn_parts[0]
-            rrn_back = rrn_parts[1]
-            if len(rrn_back) >= 1:
-                rrn_back_first = rrn_back[0]
-                rrn_normalized = f"{rrn_front}-{rrn_back_first}000000"
-            else:
-                rrn_normalized = rrn
-        else:
-            rrn_normalized = rrn
-        
-        # 세션 ID 생성
-        sid = str(uuid.uuid4())
+        # 세션 생성 (사용자 해시, state, nonce 포함)
+        sid, session_data = build_step1_session(name, rrn)
+        subject_hash = session_data["subject_hash"]
         
-        # 사용자 해시값 생성 및 저장 (정규화된 주민등록번호 사용)
-        subject_hash = generate_subject_hash(name, rrn_normalized)
-        
-        # state, nonce 생성
-        state = generate_secure_random()
-        nonce = generate_secure_random()
+        if not admit_activation(activation_starts, "step1", subject_hash, sid):
+            return too_many_activations_response()
         
         # 세션에 저장 (개인정보는 서버 내부에서만 처리)
-        session_data = {
-            "step": "step1_completed",
-            "subject_hash": subject_hash,
-            "user_name": name,
-            "user_rrn": rrn,
-            "state": state,
-            "nonce": nonce,
-            "created_at": time.time()
-        }
-        
         session_store.set(sid, session_data, expiry_seconds=600)  # 10분 만료
         
         print(f"✅ 1단계 실명확인 성공: {name} (SID: {sid})")
@@ -216,6 +321,130 @@ def step1_realname():
         print(f"❌ 1단계 실명확인 오류: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+# 제휴 판매점 대량 실명확인 (NDJSON 스트리밍)
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', '64'))
+BULK_CONCURRENCY = int(os.environ.get('BULK_CONCURRENCY', '8'))
+BULK_MAX_LINE_BYTES = 4096
+PARTNER_API_KEY = os.environ.get('PARTNER_API_KEY')
+
+bulk_executor = ThreadPoolExecutor(max_workers=BULK_CONCURRENCY, thread_name_prefix="bulk-realname")
+
+def bulk_verify_record(line_no: int, raw: bytes, budget: float) -> Tuple[Dict, Optional[Tuple[str, Dict]]]:
+    """레코드 한 건 처리 -> (응답 결과, 저장할 세션). budget은 요청에서 받은 레코드당 시간 예산"""
+    result = {"line": line_no}
+    try:
+        record = json.loads(raw)
+        if not isinstance(record, dict):
+            raise ValueError
+    except ValueError:
+        result["error"] = "Invalid JSON"
+        return result, None
+    
+    if "ref" in record:
+        result["ref"] = record["ref"]
+    
+    name = record.get("name")
+    rrn = record.get("rrn")
+    if not isinstance(name, str) or not isinstance(rrn, str):
+        result["error"] = "Missing required fields"
+        return result, None
+    name = name.strip()
+    rrn = rrn.strip()
+    if not name or not rrn:
+        result["error"] = "Missing required fields"
+        return result, None
+    
+    try:
+        verified = provider_registry.get(BULK_REALNAME_PROVIDER).call(
+            verify_realname, name, rrn, deadline=make_deadline(budget), hedge=True)
+    except ProviderUnavailable as e:
+        result["error"] = "PROVIDER_UNAVAILABLE"
+        result["reason"] = e.reason
+        return result, None
+    if not verified:
+        result["error"] = "Real name verification failed"
+        return result, None
+    
+    sid, session_data = build_step1_session(name, rrn)
+    result["sid"] = sid
+    return result, (sid, session_data)
+
+def bulk_process_batch(batch, budget: float):
+    # 오류는 끝나는 대로, 성공 건은 배치 세션 일괄 저장 후 전송 (저장 전 sid 노출 방지)
+    futures = [bulk_executor.submit(bulk_verify_record, line_no, raw, budget) for line_no, raw in batch]
+    succeeded = []
+    new_sessions = {}
+    for future in as_completed(futures):
+        result, created = future.result()
+        if created:
+            # 반복 개통 집계는 순차로 (같은 배치 안의 중복 식별자도 서로 집계되도록)
+            sid, session_data = created
+            if admit_activation(activation_starts, "bulk", session_data["subject_hash"], sid):
+                new_sessions[sid] = session_data
+                succeeded.append(result)
+                continue
+            result = {key: value for key, value in result.items() if key != "sid"}
+            result["error"] = "TOO_MANY_ACTIVATIONS"
+        yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    if new_sessions:
+        session_store.set_many(new_sessions, expiry_seconds=600)
+    for result in succeeded:
+        yield json.dumps(result, ensure_ascii=False) + "\n"
+
+@app.route("/bulk/realname", methods=["POST"])
+def bulk_realname():
+    # 제휴사 키가 설정되지 않으면 엔드포인트 비활성화 (인증 없이 대량 실명 대조 불가)
+    if not PARTNER_API_KEY:
+        return jsonify({"error": "Not found"}), 404
+    if not hmac.compare_digest(request.headers.get("X-Partner-Key", ""), PARTNER_API_KEY):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    stream = request.stream
+    # 스트림 전체가 아닌 레코드 단위 예산 (긴 스트림이 중간에 만료되지 않도록)
+    budget = request_budget()
+    
+    def generate():
+        # 배치 하나만 메모리에 유지 (입력 크기와 무관하게 일정)
+        batch = []
+        line_no = 0
+        total = 0
+        try:
+            while True:
+                raw = stream.readline(BULK_MAX_LINE_BYTES)
+                if not raw:
+                    break
+                line_no += 1
+                
+                if len(raw) >= BULK_MAX_LINE_BYTES and not raw.endswith(b"\n"):
+                    # 너무 긴 줄은 나머지를 버리고 오류 처리
+                    while True:
+                        rest = stream.readline(BULK_MAX_LINE_BYTES)
+                        if not rest or rest.endswith(b"\n"):
+                            break
+                    yield json.dumps({"line": line_no, "error": "Line too long"}) + "\n"
+                    continue
+                
+                raw = raw.strip()
+                if not raw:
+                    continue
+                batch.append((line_no, raw))
+                total += 1
+                
+                if len(batch) >= BULK_BATCH_SIZE:
+                    yield from bulk_process_batch(batch, budget)
+                    batch = []
+            
+            if batch:
+                yield from bulk_process_batch(batch, budget)
+            
+            print(f"📦 대량 실명확인 완료: {total}건")
+        except Exception as e:
+            print(f"❌ 대량 실명확인 오류: {str(e)}")
+            yield json.dumps({"error": "Internal server error"}) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
 # 2단계: 외부 인증 초기화 (보안 강화)
 @app.route("/step2/init", methods=["POST"])
 def step2_init():
@@ -224,7 +453,15 @@ def step2_init():
         if not data:
             return jsonify({"error": "Invalid JSON"}), 400
         
-        sid = data.get("sid", "").strip()
+        sid = data.get("sid", "")
+        provider = data.get("provider", "pass")
+        if not isinstance(sid, str) or not isinstance(provider, str):
+            return jsonify({"error": "Invalid parameters"}), 400
+        sid = sid.strip()
+        provider = provider.strip().lower()
+        
+        if provider not in IDP_PROVIDERS:
+            return jsonify({"error": "Unknown provider"}), 400
         
         # 세션 확인
         session_data = session_store.get(sid)
@@ -240,14 +477,20 @@ def step2_init():
         # request_id 생성
         request_id = str(uuid.uuid4())
         
+        # 인증기관 URL 생성 (1단계 사용자 정보로 요청)
+        try:
+            auth_url = provider_registry.get(provider).call(
+                idp.create_auth_url, request_id, session_data["state"],
+                deadline=request_deadline(), hedge=True)
+        except ProviderUnavailable as e:
+            return provider_unavailable_response(e)
+        
         # 세션 업데이트 (1단계 사용자 정보 유지)
         session_data["request_id"] = request_id
+        session_data["provider"] = provider
         session_data["step"] = "step2_initiated"
         session_store.set(sid, session_data, expiry_seconds=600)
         
-        # 인증기관 URL 생성 (1단계 사용자 정보로 요청)
-        auth_url = idp.create_auth_url(request_id, session_data["state"])
-        
         print(f"🔄 2단계 인증 초기화: SID {sid}, Request ID {request_id}")
         print(f"✅ 보안: 1단계 사용자 정보({step1_name})로 IDP 요청")
         
@@ -275,6 +518,7 @@ def step2_callback():
         
         # 필수 파라미터 검증
         if not request_id or not state or not idp_signed_token:
+            audit_callback_failure(None, None, "missing_parameters", request_id=request_id or None)
             return jsonify({"error": "Missing required parameters"}), 400
         
         # request_id로 세션 찾기
@@ -287,22 +531,32 @@ def step2_callback():
                 break
         
         if not session_data or session_data.get("step") != "step2_initiated":
+            # 알 수 없거나 재사용된 request_id (변조/재전송 의심)
+            audit_callback_failure(None, None, "invalid_session_or_step", request_id=request_id)
             return jsonify({"error": "Invalid session or step"}), 400
         
         # 1. State 검증
         if not hmac.compare_digest(state, session_data.get("state", "")):
             print(f"❌ State 불일치: {state} != {session_data.get('state')}")
+            audit_callback_failure(sid, session_data, "invalid_state")
             return jsonify({"error": "Invalid state"}), 400
         
-        # 2. IDP 토큰 검증
-        idp_payload = idp.verify_token(idp_signed_token)
+        # 2. IDP 토큰 검증 (JTI 소비가 있어 헤지하지 않음)
+        try:
+            idp_payload = provider_registry.get(session_data.get("provider", "pass")).call(
+                idp.verify_token, idp_signed_token, deadline=request_deadline())
+        except ProviderUnavailable as e:
+            audit_callback_failure(sid, session_data, f"provider_unavailable:{e.reason}")
+            return provider_unavailable_response(e)
         if not idp_payload:
             print("❌ IDP 토큰 검증 실패")
+            audit_callback_failure(sid, session_data, "invalid_idp_token")
             return jsonify({"error": "Invalid IDP token"}), 400
         
         # 3. Nonce 검증
         if not hmac.compare_digest(idp_payload.get("nonce", ""), session_data.get("nonce", "")):
             print(f"❌ Nonce 불일치: {idp_payload.get('nonce')} != {session_data.get('nonce')}")
+            audit_callback_failure(sid, session_data, "invalid_nonce")
             return jsonify({"error": "Invalid nonce"}), 400
         print("✅ Nonce 검증 성공")
         
@@ -380,6 +634,10 @@ def finalize():
         
         # 최종 JWT 발급 (1단계 사용자 명의로)
         final_user = session_data.get("final_user", {})
+        
+        if not admit_activation(activation_completions, "finalize",
+                                final_user.get("subject_hash", ""), sid):
+            return too_many_activations_response()
         final_payload = {
             "sid": sid,
             "user_verified": True,
@@ -400,6 +658,24 @@ def finalize():
         idp_user = session_data.get("idp_user", {})
         data_mismatch = final_user.get("name") != idp_user.get("name")
         
+        # 감사 로그 (주민번호는 기록하지 않음)
+        audit_log.record("finalize", sid=sid,
+                         subject_hash=final_user.get("subject_hash"),
+                         final_user_name=final_user.get("name"),
+                         idp_user_name=idp_user.get("name"),
+                         idp_subject_hash=idp_user.get("subject_hash"),
+                         provider=session_data.get("provider"),
+                         data_mismatch=data_mismatch,
+                         jti=final_payload.get("jti"),
+                         client_ip=request.remote_addr)
+        if data_mismatch:
+            audit_log.record("mismatch", sid=sid,
+                             subject_hash=final_user.get("subject_hash"),
+                             final_user_name=final_user.get("name"),
+                             idp_user_name=idp_user.get("name"),
+                             idp_subject_hash=idp_user.get("subject_hash"),
+                             provider=session_data.get("provider"))
+        
         # 세션에 개통 완료 정보 저장
         session["contract_complete"] = {
             "step1_data": {
@@ -410,7 +686,7 @@ def finalize():
             "step2_data": {
                 "name": idp_user.get("name", final_user.get("name")),  # IDP 사용자 또는 동일 사용자
                 "phone": "010-9876-5432",
-                "provider": "PASS"
+                "provider": session_data.get("provider", "pass")
             },
             "data_mismatch": data_mismatch
         }
@@ -717,6 +993,46 @@ def admin():
     
     return render_template("admin.html", total_users=total_users, users=users)
 
+# 감사 로그 조회 (조사용)
+@app.route("/admin/audit")
+def admin_audit():
+    if not session.get("logged_in"):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    try:
+        since = request.args.get("since", type=float)
+        until = request.args.get("until", type=float)
+        limit = max(1, min(request.args.get("limit", 100, type=int), 1000))
+        
+        events = audit_log.query(
+            subject_hash=request.args.get("subject_hash"),
+            event=request.args.get("event"),
+            since=since,
+            until=until,
+            limit=limit
+        )
+        
+        return jsonify({"events": events, "stats": audit_log.stats()}), 200
+        
+    except Exception as e:
+        print(f"❌ 감사 로그 조회 오류: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+# 반복 개통 상위 식별자 조회
+@app.route("/admin/repeat_activations")
+def admin_repeat_activations():
+    if not session.get("logged_in"):
+        return jsonify({"error": "Unauthorized"}), 401
+    
+    limit = max(1, min(request.args.get("limit", 20, type=int), 200))
+    return jsonify({
+        "threshold": ACTIVATION_THRESHOLD,
+        "window_seconds": ACTIVATION_WINDOW_SECONDS,
+        "action": ACTIVATION_ACTION,
+        "starts": activation_starts.top(limit),
+        "completions": activation_completions.top(limit)
+    }), 200
+
 @app.route("/logout")
 def logout():
     session.clear()
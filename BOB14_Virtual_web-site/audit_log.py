@@ -0,0 +1,155 @@
+import atexit
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+# 개통 감사 로그 (write-behind)
+# 요청 스레드는 메모리 링 버퍼에 넣기만 하고, 백그라운드 기록기가
+# 모아서 한 트랜잭션으로 커밋한다 (요청 경로에 디스크 지연 없음).
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    event TEXT NOT NULL,
+    sid TEXT,
+    subject_hash TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audit_subject_hash ON audit_events (subject_hash, ts);
+CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit_events (ts);
+"""
+
+
+class AuditLog:
+    def __init__(self, db_path: str, capacity: int = 65536, batch_size: int = 512,
+                 flush_interval: float = 0.2, put_timeout: float = 0.05):
+        self.db_path = db_path
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+
+        self.buffer: Deque[tuple] = deque()
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.written = 0
+        self.closed = False
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self.writer = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def record(self, event: str, sid: Optional[str] = None,
+               subject_hash: Optional[str] = None, **details) -> bool:
+        """이벤트를 버퍼에 적재. 버퍼가 가득 차면 잠시 기다리고, 그래도 안 되면 버림"""
+        row = (time.time(), event, sid, subject_hash,
+               json.dumps(details, ensure_ascii=False, default=str))
+        with self.cond:
+            if self.closed:
+                return False
+            if len(self.buffer) >= self.capacity:
+                # 역압: 기록기가 비울 때까지 짧게 대기
+                self.cond.notify_all()
+                self.cond.wait_for(lambda: len(self.buffer) < self.capacity or self.closed,
+                                   timeout=self.put_timeout)
+                if len(self.buffer) >= self.capacity or self.closed:
+                    self.dropped += 1
+                    return False
+            self.buffer.append(row)
+            if len(self.buffer) >= self.batch_size:
+                self.cond.notify_all()
+        return True
+
+    def _take_batch(self) -> List[tuple]:
+        with self.cond:
+            self.cond.wait_for(lambda: len(self.buffer) >= self.batch_size or self.closed,
+                               timeout=self.flush_interval)
+            batch = []
+            while self.buffer and len(batch) < self.batch_size:
+                batch.append(self.buffer.popleft())
+            if batch:
+                self.cond.notify_all()
+            return batch
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            batch = self._take_batch()
+            if batch:
+                try:
+                    with conn:
+                        conn.executemany(
+                            "INSERT INTO audit_events (ts, event, sid, subject_hash, payload) "
+                            "VALUES (?, ?, ?, ?, ?)", batch)
+                    with self.cond:
+                        self.written += len(batch)
+                except sqlite3.Error as e:
+                    print(f"❌ 감사 로그 기록 실패: {str(e)} ({len(batch)}건 유실)")
+                    with self.cond:
+                        self.dropped += len(batch)
+            elif self.closed:
+                break
+        conn.close()
+
+    def close(self):
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify_all()
+        self.writer.join(timeout=10)
+
+    def stats(self) -> Dict:
+        with self.cond:
+            return {"pending": len(self.buffer), "written": self.written, "dropped": self.dropped}
+
+    def query(self, subject_hash: Optional[str] = None, event: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None,
+              limit: int = 100) -> List[Dict]:
+        """조사용 조회 (아직 커밋되지 않은 버퍼 내용은 포함하지 않음)"""
+        clauses, params = [], []
+        if subject_hash:
+            clauses.append("subject_hash = ?")
+            params.append(subject_hash)
+        if event:
+            clauses.append("event = ?")
+            params.append(event)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(limit)
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                f"SELECT id, ts, event, sid, subject_hash, payload FROM audit_events "
+                f"{where} ORDER BY ts DESC LIMIT ?", params).fetchall()
+        finally:
+            conn.close()
+
+        return [{
+            "id": row[0],
+            "ts": row[1],
+            "event": row[2],
+            "sid": row[3],
+            "subject_hash": row[4],
+            "details": json.loads(row[5])
+        } for row in rows]
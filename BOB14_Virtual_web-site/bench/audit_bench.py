@@ -0,0 +1,74 @@
+"""감사 로그 처리량 벤치마크
+
+여러 스레드가 finalize 이벤트를 적재할 때 지속 가능한 초당 이벤트 수와
+요청 스레드가 부담하는 적재 지연(p50/p99), 유실 건수를 측정한다.
+
+    python bench/audit_bench.py --events 200000 --threads 8
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audit_log import AuditLog  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--capacity", type=int, default=65536)
+    parser.add_argument("--batch-size", type=int, default=512)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log = AuditLog(os.path.join(tmp, "audit.db"), capacity=args.capacity,
+                       batch_size=args.batch_size)
+        per_thread = args.events // args.threads
+        latencies = [[] for _ in range(args.threads)]
+
+        def produce(index):
+            samples = latencies[index]
+            for i in range(per_thread):
+                subject_hash = hashlib.sha256(f"{index}:{i % 1000}".encode()).hexdigest()
+                started = time.perf_counter()
+                log.record("finalize", sid=f"{index}-{i}", subject_hash=subject_hash,
+                           final_user_name="홍길동", idp_user_name="홍길동",
+                           data_mismatch=False, provider="pass")
+                samples.append(time.perf_counter() - started)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=produce, args=(i,)) for i in range(args.threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        enqueued = time.monotonic() - started
+        log.close()
+        drained = time.monotonic() - started
+
+        total = per_thread * args.threads
+        flat = [x for samples in latencies for x in samples]
+        stats = log.stats()
+        print(f"events        {total}")
+        print(f"enqueue       {total / enqueued:,.0f} events/s")
+        print(f"committed     {stats['written'] / drained:,.0f} events/s (sustained, incl. drain)")
+        print(f"record() p50  {percentile(flat, 0.5) * 1e6:.1f}us  p99 {percentile(flat, 0.99) * 1e6:.1f}us")
+        print(f"written {stats['written']}  dropped {stats['dropped']}")
+
+        sample = log.query(subject_hash=hashlib.sha256(b"0:0").hexdigest(), limit=5)
+        print(f"query by subject_hash -> {len(sample)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""대량 실명확인 벤치마크
+
+로컬 서버를 띄워 /step1/realname 건별 호출과 /bulk/realname NDJSON 스트리밍의
+초당 처리 레코드 수를 비교한다.
+
+대량 경로의 메모리는 (레코드 수 x 배치 크기) 조합마다 새 프로세스에서
+WSGI 앱을 직접 호출해 tracemalloc 최대치로 측정한다. 생성된 세션은 운영에서
+프로세스 밖 저장소(Redis)에 남는 결과물이므로 건수만 세고 보관하지 않으며,
+배치/응답 버퍼/스레드 풀 등 작업 메모리가 레코드 수와 무관하게 일정한지 확인한다.
+
+    python bench/bulk_bench.py --records 2000 20000 --batch-sizes 16 64 256
+"""
+import argparse
+import contextlib
+import gc
+import http.client
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("PARTNER_API_KEY", "bench-partner-key")
+
+from werkzeug.serving import make_server  # noqa: E402
+from werkzeug.test import EnvironBuilder  # noqa: E402
+
+import app as web  # noqa: E402
+
+
+def records(count, offset=0):
+    for i in range(offset, offset + count):
+        yield {"ref": i, "name": f"고객{i}", "rrn": f"{900101 + i % 300:06d}-1{i % 1000000:06d}"}
+
+
+def start_server():
+    server = make_server("127.0.0.1", 0, web.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def per_request(port, count):
+    started = time.monotonic()
+    ok = 0
+    for record in records(count):
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        conn.request("POST", "/step1/realname", body=json.dumps(record),
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        ok += response.status == 200
+        response.read()
+        conn.close()
+    return ok, time.monotonic() - started
+
+
+def bulk(port, count, offset=0):
+    def body():
+        for record in records(count, offset):
+            yield (json.dumps(record) + "\n").encode()
+
+    started = time.monotonic()
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("POST", "/bulk/realname", body=body(), encode_chunked=True,
+                 headers={"Content-Type": "application/x-ndjson", "Transfer-Encoding": "chunked",
+                          "X-Partner-Key": os.environ["PARTNER_API_KEY"]})
+    response = conn.getresponse()
+    ok = 0
+    for line in response:
+        ok += "sid" in json.loads(line)
+    conn.close()
+    return ok, time.monotonic() - started
+
+
+class StreamedBody(io.RawIOBase):
+    """청크 제너레이터를 wsgi.input으로 흘려 넣는 파일 객체 (본문 전체를 만들지 않음)"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            self.pending = next(self.chunks, None)
+            if self.pending is None:
+                self.pending = b""
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def bulk_wsgi(count, offset=0):
+    # 개발 서버는 응답 후 남은 본문을 10MB 버퍼로 비우므로 메모리 측정은 WSGI 앱을 직접 호출
+    chunks = ((json.dumps(record) + "\n").encode() for record in records(count, offset))
+    environ = EnvironBuilder(method="POST", path="/bulk/realname",
+                             headers={"Content-Type": "application/x-ndjson",
+                                      "X-Partner-Key": os.environ["PARTNER_API_KEY"]}).get_environ()
+    environ.pop("CONTENT_LENGTH", None)
+    environ["wsgi.input"] = io.BufferedReader(StreamedBody(chunks))
+    environ["wsgi.input_terminated"] = True
+
+    started = time.monotonic()
+    response = web.app(environ, lambda status, headers, exc_info=None: None)
+    ok = 0
+    try:
+        for chunk in response:
+            ok += chunk.count(b'"sid"')
+    finally:
+        response.close()
+    return ok, time.monotonic() - started
+
+
+class CountingStore(web.SessionStore):
+    """세션을 보관하지 않고 건수만 세는 저장소 (운영에서는 Redis 등 프로세스 밖에 저장됨)"""
+
+    def __init__(self):
+        super().__init__()
+        self.stored = 0
+
+    def set_many(self, items, expiry_seconds=600):
+        self.stored += len(items)
+
+
+def measure_bulk(count):
+    """새 프로세스에서 호출됨. 결과를 JSON 한 줄로 출력한다."""
+    web.session_store = store = CountingStore()
+
+    # 스레드 풀, 지연 추적기 등 일회성 초기화는 측정에서 제외
+    with contextlib.redirect_stdout(io.StringIO()):
+        bulk_wsgi(web.BULK_BATCH_SIZE * web.BULK_CONCURRENCY * 2, offset=10_000_000)
+    store.stored = 0
+    gc.collect()
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok, elapsed = bulk_wsgi(count)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(json.dumps({
+        "ok": ok,
+        "stored": store.stored,
+        "elapsed": elapsed,
+        "peak": peak - base,
+        "retained": current - base,
+    }))
+
+
+def run_child(count, batch_size):
+    # 탐지 윈도우 구간 교체(고정 크기 배열 재할당)는 시각에 따라 측정 중에 끼어들 수 있으므로 제외
+    env = dict(os.environ, BULK_BATCH_SIZE=str(batch_size), ACTIVATION_WINDOW_SECONDS=str(365 * 86400))
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(count)],
+                         env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--per-request", type=int, default=2000, help="HTTP 처리량 비교 건수 (0이면 생략)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        measure_bulk(args.child)
+        return
+
+    if args.per_request:
+        server = start_server()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok, elapsed = per_request(server.server_port, args.per_request)
+            ok_bulk, elapsed_bulk = bulk(server.server_port, args.per_request, offset=args.per_request)
+        server.shutdown()
+        print(f"per-request  {ok}/{args.per_request} ok  {args.per_request / elapsed:8.0f} records/s")
+        print(f"bulk         {ok_bulk}/{args.per_request} ok  {args.per_request / elapsed_bulk:8.0f} records/s")
+        print()
+
+    print(f"{'batch':>5} {'records':>8} {'stored':>8} {'records/s':>10} {'peak':>10} {'retained':>10}")
+    for batch_size in args.batch_sizes:
+        peaks = []
+        for count in sorted(args.records):
+            result = run_child(count, batch_size)
+            peaks.append(result["peak"])
+            print(f"{batch_size:>5} {count:>8} {result['stored']:>8} {count / result['elapsed']:>10.0f} "
+                  f"{result['peak'] / 2**10:>8.0f}Ki {result['retained'] / 2**10:>8.0f}Ki")
+        print(f"      peak {min(args.records)} -> {max(args.records)} records: "
+              f"{(peaks[-1] - peaks[0]) / 2**10:+.0f} KiB")
+    print()
+    print("peak/retained = tracemalloc peak and residue of the bulk request, "
+          "sessions are counted but not kept (external store)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""외부 연동 장애 격리 벤치마크
+
+지연/오류를 주입하는 로컬 대역 서버(PASS/카카오/네이버)를 띄우고
+직접 호출과 ResilientProvider 경유 호출의 goodput, 꼬리 지연을 비교한다.
+
+    python bench/resilience_bench.py --requests 600 --workers 32
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resilience import Deadline, ProviderRegistry, ProviderUnavailable  # noqa: E402
+
+# 인증기관별 주입 프로파일: (기본 지연, 느린 응답 비율, 느린 응답 지연, 오류 비율)
+PROFILES = {
+    "pass": (0.02, 0.5, 2.0, 0.2),   # 장애 중
+    "kakao": (0.02, 0.03, 0.4, 0.0),
+    "naver": (0.02, 0.03, 0.4, 0.0),
+}
+
+
+def make_handler(profile):
+    base, slow_ratio, slow_delay, error_ratio = profile
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(slow_delay if random.random() < slow_ratio else base)
+            if random.random() < error_ratio:
+                self.send_response(502)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def start_servers():
+    urls = {}
+    for name, profile in PROFILES.items():
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(profile))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        urls[name] = f"http://127.0.0.1:{server.server_address[1]}/"
+    return urls
+
+
+def fetch(url, timeout):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return response.read()
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(label, call, urls, total, workers):
+    names = list(urls)
+    results = {name: [] for name in names}
+
+    def one(i):
+        name = names[i % len(names)]
+        started = time.monotonic()
+        ok = call(name, urls[name])
+        results[name].append((ok, time.monotonic() - started))
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(one, range(total)))
+    elapsed = time.monotonic() - started
+
+    print(f"\n[{label}] {total} requests in {elapsed:.2f}s")
+    for name in names:
+        latencies = [t for _, t in results[name]]
+        good = sum(1 for ok, _ in results[name] if ok)
+        print(f"  {name:6s} goodput {good / elapsed:7.1f}/s  success {good}/{len(latencies)}  "
+              f"p50 {percentile(latencies, 0.5) * 1000:6.0f}ms  "
+              f"p95 {percentile(latencies, 0.95) * 1000:6.0f}ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:6.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--timeout", type=float, default=3.0)
+    args = parser.parse_args()
+
+    urls = start_servers()
+
+    def direct(name, url):
+        try:
+            fetch(url, args.timeout)
+            return True
+        except Exception:
+            return False
+
+    registry = ProviderRegistry(max_concurrency=16, failure_threshold=5, reset_timeout=1.0)
+
+    def resilient(name, url):
+        try:
+            registry.get(name).call(fetch, url, args.timeout,
+                                    deadline=Deadline(args.timeout), hedge=True)
+            return True
+        except ProviderUnavailable:
+            return False
+
+    run("direct", direct, urls, args.requests, args.workers)
+    run("resilient", resilient, urls, args.requests, args.workers)
+
+
+if __name__ == "__main__":
+    main()
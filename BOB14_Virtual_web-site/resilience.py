@@ -0,0 +1,215 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Deque, Dict, List, Optional
+
+# 외부 연동(인증기관/실명확인) 장애 격리 계층
+# - 인증기관별 회로 차단기 (PASS 지연이 카카오/네이버 사용자에게 번지지 않도록)
+# - 요청 데드라인 전파 (클라이언트가 포기한 뒤에도 워커를 붙잡지 않도록)
+# - p95 기반 헤지 요청 (꼬리 지연 완화, 멱등 호출에만 사용)
+
+
+class ProviderUnavailable(Exception):
+    """외부 연동을 빠르게 포기해야 할 때 발생 (회로 열림/데드라인 초과/격벽 포화)"""
+
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider}: {reason}")
+        self.provider = provider
+        self.reason = reason
+
+
+class Deadline:
+    """요청 단위 남은 시간 예산
+
+    shortened: 클라이언트가 기본 타임아웃보다 줄인 예산인지 여부.
+    줄인 예산의 만료는 상대 기관 장애로 보지 않는다 (회로 차단기에 반영 안 함).
+    """
+
+    def __init__(self, budget_seconds: float, shortened: bool = False):
+        self.expires_at = time.monotonic() + budget_seconds
+        self.shortened = shortened
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+# 회로 차단기
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+            # HALF_OPEN: 시험 호출 1건만 통과
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.trial_in_flight = False
+
+    def record_rejection(self):
+        # 로컬 격벽 포화는 상대 기관 장애가 아니므로 실패로 세지 않음
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            self.trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def is_open(self) -> bool:
+        with self.lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+
+# 최근 응답시간 기록 (헤지 지연 계산용)
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self.lock:
+            if len(self.samples) < 20:
+                return None
+            ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * pct))
+        return ordered[index]
+
+
+class ResilientProvider:
+    """인증기관 하나에 대한 차단기 + 격벽(전용 스레드 풀) + 헤지 호출"""
+
+    def __init__(self, name: str, max_concurrency: int = 16, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, hedge_percentile: float = 0.95,
+                 min_hedge_delay: float = 0.05):
+        self.name = name
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.latency = LatencyTracker()
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                           thread_name_prefix=f"provider-{name}")
+        # 격벽: 풀 대기열에 무한정 쌓이지 않도록 동시 호출 수 제한
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+
+    def hedge_delay(self) -> Optional[float]:
+        p = self.latency.percentile(self.hedge_percentile)
+        if p is None:
+            return None
+        return max(self.min_hedge_delay, p)
+
+    def _submit(self, fn: Callable, args: tuple):
+        if not self.slots.acquire(blocking=False):
+            return None
+
+        def run():
+            started = time.monotonic()
+            try:
+                return fn(*args)
+            finally:
+                self.latency.record(time.monotonic() - started)
+
+        future = self.executor.submit(run)
+        # 슬롯 반환은 완료 콜백에서 (실행 전에 취소된 헤지 요청도 반환되도록)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def call(self, fn: Callable, *args, deadline: Deadline, hedge: bool = False):
+        if deadline.expired():
+            raise ProviderUnavailable(self.name, "deadline_exceeded")
+        if not self.breaker.allow():
+            raise ProviderUnavailable(self.name, "circuit_open")
+
+        first = self._submit(fn, args)
+        if first is None:
+            self.breaker.record_rejection()
+            raise ProviderUnavailable(self.name, "bulkhead_full")
+        pending = {first}
+
+        delay = self.hedge_delay() if hedge else None
+        if delay is not None and delay < deadline.remaining():
+            done, _ = wait(pending, timeout=delay)
+            if not done:
+                second = self._submit(fn, args)
+                if second is not None:
+                    pending.add(second)
+
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, timeout=deadline.remaining(),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    for other in pending:
+                        other.cancel()
+                    self.breaker.record_success()
+                    return future.result()
+                last_error = error
+
+        for other in pending:
+            other.cancel()
+        if last_error is not None:
+            self.breaker.record_failure()
+            # 상세 오류는 서버 로그에만 남기고 클라이언트에는 고정 코드만 전달
+            print(f"❌ 외부 연동 오류: {self.name} ({last_error!r})")
+            raise ProviderUnavailable(self.name, "upstream_error") from last_error
+        if deadline.shortened:
+            # 클라이언트 예산 부족: 누구나 조작 가능하므로 공유 회로를 열지 않음
+            self.breaker.record_rejection()
+        else:
+            self.breaker.record_failure()
+        raise ProviderUnavailable(self.name, "deadline_exceeded")
+
+
+class ProviderRegistry:
+    def __init__(self, **provider_options):
+        self.provider_options = provider_options
+        self.providers: Dict[str, ResilientProvider] = {}
+        self.lock = threading.Lock()
+
+    def get(self, name: str) -> ResilientProvider:
+        with self.lock:
+            if name not in self.providers:
+                self.providers[name] = ResilientProvider(name, **self.provider_options)
+            return self.providers[name]
+
+    def available(self, names: List[str]) -> List[str]:
+        """회로가 열려있지 않은 인증기관 목록 (UI 대체 인증기관 안내용)"""
+        return [name for name in names if not self.get(name).breaker.is_open()]
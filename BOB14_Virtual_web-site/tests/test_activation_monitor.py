@@ -0,0 +1,57 @@
+import hashlib
+import threading
+
+from activation_monitor import ActivationMonitor
+
+
+def subject(name: str) -> str:
+    return hashlib.sha256(name.encode()).hexdigest()
+
+
+def test_record_counts_within_window():
+    monitor = ActivationMonitor(threshold=5, window_seconds=600, buckets=6, width=1024)
+    key = subject("a")
+    for i in range(4):
+        assert monitor.record(key, now=1000 + i) == i + 1
+    assert monitor.count(key, now=1010) == 4
+    assert monitor.count(subject("b"), now=1010) == 0
+
+
+def test_record_expires_after_window():
+    monitor = ActivationMonitor(threshold=5, window_seconds=600, buckets=6, width=1024)
+    key = subject("a")
+    for i in range(4):
+        monitor.record(key, now=1000 + i)
+    assert monitor.count(key, now=1000 + 2000) == 0
+
+
+def test_try_record_stops_at_threshold():
+    monitor = ActivationMonitor(threshold=3, window_seconds=600, width=1024)
+    key = subject("a")
+    assert [monitor.try_record(key, now=1000) for _ in range(5)] == [1, 2, 3, None, None]
+    # 차단된 시도는 집계되지 않음
+    assert monitor.count(key, now=1000) == 3
+
+
+def test_try_record_is_atomic_under_concurrency():
+    monitor = ActivationMonitor(threshold=3, window_seconds=600, width=1024)
+    key = subject("a")
+    results = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(32)
+
+    def worker():
+        barrier.wait()
+        result = monitor.try_record(key, now=1000)
+        with lock:
+            results.append(result)
+
+    threads = [threading.Thread(target=worker) for _ in range(32)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(r for r in results if r is not None) == [1, 2, 3]
+    assert results.count(None) == 29
+    assert monitor.count(key, now=1000) == 3
@@ -0,0 +1,145 @@
+import random
+import threading
+import time
+
+import pytest
+
+from resilience import CircuitBreaker, Deadline, ProviderUnavailable, ResilientProvider
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.is_open()
+
+
+def test_breaker_success_resets_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_breaker_half_open_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.01)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_rejection_is_not_a_failure():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_rejection()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # 시험 호출 자리가 반환되어 다음 호출이 다시 시험 가능
+    assert breaker.allow()
+
+
+def test_call_returns_result_and_records_success():
+    provider = ResilientProvider("test", max_concurrency=2)
+    assert provider.call(lambda x: x * 2, 21, deadline=Deadline(1)) == 42
+    assert provider.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_call_hides_upstream_error_text():
+    provider = ResilientProvider("test", max_concurrency=2, failure_threshold=1)
+
+    def boom():
+        raise RuntimeError("internal detail")
+
+    with pytest.raises(ProviderUnavailable) as excinfo:
+        provider.call(boom, deadline=Deadline(1))
+    assert excinfo.value.reason == "upstream_error"
+    assert provider.breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(ProviderUnavailable) as excinfo:
+        provider.call(lambda: None, deadline=Deadline(1))
+    assert excinfo.value.reason == "circuit_open"
+
+
+def test_full_deadline_timeout_counts_as_failure():
+    provider = ResilientProvider("test", max_concurrency=2, failure_threshold=1)
+    with pytest.raises(ProviderUnavailable) as excinfo:
+        provider.call(time.sleep, 0.2, deadline=Deadline(0.02))
+    assert excinfo.value.reason == "deadline_exceeded"
+    assert provider.breaker.state == CircuitBreaker.OPEN
+
+
+def test_shortened_deadline_timeout_does_not_open_circuit():
+    provider = ResilientProvider("test", max_concurrency=4, failure_threshold=1)
+    for _ in range(3):
+        with pytest.raises(ProviderUnavailable):
+            provider.call(time.sleep, 0.2, deadline=Deadline(0.02, shortened=True))
+    assert provider.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_bulkhead_full_does_not_open_circuit():
+    provider = ResilientProvider("test", max_concurrency=1, failure_threshold=1)
+    release = threading.Event()
+    blocker = threading.Thread(target=provider.call, args=(release.wait, 1),
+                               kwargs={"deadline": Deadline(2)})
+    blocker.start()
+    time.sleep(0.05)
+
+    with pytest.raises(ProviderUnavailable) as excinfo:
+        provider.call(lambda: None, deadline=Deadline(1))
+    assert excinfo.value.reason == "bulkhead_full"
+    assert provider.breaker.state == CircuitBreaker.CLOSED
+
+    release.set()
+    blocker.join()
+
+
+def test_slots_returned_after_hedged_calls_are_cancelled():
+    # 헤지 요청이 실행 전에 취소되어도 격벽 슬롯이 모두 반환되어야 함
+    max_concurrency = 4
+    provider = ResilientProvider("test", max_concurrency=max_concurrency, min_hedge_delay=0.0005)
+    for _ in range(50):
+        provider.latency.record(0.0005)
+
+    def upstream():
+        time.sleep(random.choice((0, 0.0005, 0.002)))
+        return True
+
+    def worker():
+        for _ in range(150):
+            try:
+                provider.call(upstream, deadline=Deadline(1), hedge=True)
+            except ProviderUnavailable:
+                pass
+
+    threads = [threading.Thread(target=worker) for _ in range(32)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    provider.executor.shutdown(wait=True)
+
+    assert provider.slots._value == max_concurrency